@@ -14,47 +14,103 @@
 import sys
 import math
 import json
+try:
+    import numpy as np  # Optional: speeds up arrow hit-testing on large maps
+except ImportError:
+    np = None
+try:
+    import orjson  # Optional: much faster saving and loading of large maps
+except ImportError:
+    orjson = None
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit,
     QFileDialog, QScrollArea
 )
-from PyQt6.QtGui import QPainter, QPen, QBrush, QFont, QColor, QFontMetrics
-from PyQt6.QtCore import Qt, QRectF, QPointF
+from PyQt6.QtGui import (
+    QPainter, QPainterPath, QPen, QBrush, QFont, QColor, QFontMetrics, QPolygonF, QPixmap, QTransform
+)
+from PyQt6.QtCore import Qt, QRectF, QPointF, QLineF, QSizeF, QTimer
 
 from PyQt6.QtSvgWidgets import QSvgWidget  # For SVG export, but we use QSvgGenerator below
 from PyQt6.QtSvg import QSvgGenerator
 
 CANVAS_BG = QColor(255, 255, 255)
+ARROW_SIZE = 15
+# Arrowhead sides sit 30 degrees either side of the shaft.
+ARROWHEAD_COS = math.cos(math.pi / 6)
+ARROWHEAD_SIN = math.sin(math.pi / 6)
+# Extra room around an item's geometry for pen width and antialiasing.
+PAINT_MARGIN = 4
+# Side length of the square cells used to bucket nodes for hit-testing.
+GRID_CELL = 128
 
 class Node:
-    def __init__(self, x, y, text="Node", font=None):
-        self.x = x
-        self.y = y
+    # Cheaper to branch on than isinstance(node, TextNode) in hot loops.
+    is_text = False
+
+    def __init__(self, x, y, text="Node", font=None, metrics=None):
+        # geom_version is bumped whenever position or size changes so that
+        # arrows can tell when their cached endpoints are stale.
+        self.geom_version = 0
+        self._x = x
+        self._y = y
         self.text = text
         self.selected = False
-        self.font = font if font else QFont()
-        self.font.setPointSize(12)
+        if font is None:
+            font = QFont()
+            font.setPointSize(12)
+        self.font = font
+        # Reuse the canvas's metrics when given instead of building one per node.
+        self.metrics = metrics if metrics else QFontMetrics(self.font)
         self.set_text(self.text)
 
     def set_text(self, text):
         self.text = text
-        metrics = QFontMetrics(self.font)
-        text_width = metrics.horizontalAdvance(self.text)
-        text_height = metrics.height()
+        text_width = self.metrics.horizontalAdvance(self.text)
+        text_height = self.metrics.height()
         self.w = text_width + 18
         self.h = text_height + 12
+        self._update_geometry()
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self.set_pos(value, self._y)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self.set_pos(self._x, value)
+
+    def set_pos(self, x, y):
+        self._x = x
+        self._y = y
+        self._update_geometry()
+
+    def _update_geometry(self):
+        # rect() and center() are hot during painting and hit-testing, so
+        # build them once per change rather than on every call.
+        self._rect = QRectF(self._x, self._y, self.w, self.h)
+        self._center = self._rect.center()
+        self.geom_version += 1
 
     def rect(self):
-        return QRectF(self.x, self.y, self.w, self.h)
+        return self._rect
 
     def center(self):
-        return QPointF(self.x + self.w / 2, self.y + self.h / 2)
+        return self._center
 
     def contains(self, point):
         return self.rect().contains(point)
 
     def boundary_point(self, target):
-        cx, cy = self.center().x(), self.center().y()
+        cx, cy = self._center.x(), self._center.y()
         tx, ty = target.x(), target.y()
         dx, dy = tx - cx, ty - cy
         if dx == 0 and dy == 0:
@@ -76,21 +132,15 @@ class Node:
         }
 
     @classmethod
-    def from_dict(cls, d, font=None):
-        return cls(d["x"], d["y"], d["text"], font=font)
+    def from_dict(cls, d, font=None, metrics=None):
+        return cls(d["x"], d["y"], d["text"], font=font, metrics=metrics)
 
 class TextNode(Node):
-    def __init__(self, x, y, text="Text", font=None):
-        super().__init__(x, y, text, font)
-        self.bg_color = CANVAS_BG
+    is_text = True
 
-    def set_text(self, text):
-        self.text = text
-        metrics = QFontMetrics(self.font)
-        text_width = metrics.horizontalAdvance(self.text)
-        text_height = metrics.height()
-        self.w = text_width + 18
-        self.h = text_height + 12
+    def __init__(self, x, y, text="Text", font=None, metrics=None):
+        super().__init__(x, y, text, font, metrics)
+        self.bg_color = CANVAS_BG
 
     def draw(self, painter, selected=False):
         painter.setPen(Qt.PenStyle.NoPen)
@@ -109,22 +159,40 @@ class TextNode(Node):
         }
 
     @classmethod
-    def from_dict(cls, d, font=None):
-        return cls(d["x"], d["y"], d["text"], font=font)
+    def from_dict(cls, d, font=None, metrics=None):
+        return cls(d["x"], d["y"], d["text"], font=font, metrics=metrics)
 
 class Arrow:
     def __init__(self, start_node, end_node):
         self.start_node = start_node
         self.end_node = end_node
         self.selected = False
+        self._cached_points = None
+        self._cached_rect = None
+        self._cached_version = None
 
     def points(self):
-        start = self.start_node.boundary_point(self.end_node.center())
-        end = self.end_node.boundary_point(self.start_node.center())
-        return start, end
+        # Endpoints only change when one of the two nodes moves or resizes,
+        # so reuse the last result until either node's geom_version changes.
+        version = (self.start_node.geom_version, self.end_node.geom_version)
+        if self._cached_version != version:
+            start = self.start_node.boundary_point(self.end_node.center())
+            end = self.end_node.boundary_point(self.start_node.center())
+            self._cached_points = (start, end)
+            self._cached_rect = QRectF(start, end).normalized().adjusted(
+                -ARROW_SIZE, -ARROW_SIZE, ARROW_SIZE, ARROW_SIZE)
+            self._cached_version = version
+        return self._cached_points
+
+    def bounding_rect(self):
+        self.points()
+        return self._cached_rect
 
     def contains(self, pos, tolerance=8):
         start, end = self.points()
+        # Cheap rejection before the point-to-segment distance.
+        if tolerance <= ARROW_SIZE and not self._cached_rect.contains(pos):
+            return False
         x0, y0 = pos.x(), pos.y()
         x1, y1 = start.x(), start.y()
         x2, y2 = end.x(), end.y()
@@ -138,10 +206,11 @@ class Arrow:
         dist = math.hypot(x0 - proj_x, y0 - proj_y)
         return dist < tolerance
 
-    def to_dict(self, node_indices):
+    def to_dict(self):
+        # _save_idx is stamped on each node by CanvasWidget.save_diagram.
         return {
-            "start": node_indices[self.start_node],
-            "end": node_indices[self.end_node]
+            "start": self.start_node._save_idx,
+            "end": self.end_node._save_idx
         }
 
     @classmethod
@@ -153,19 +222,48 @@ class CanvasWidget(QWidget):
         super().__init__(parent)
         self.nodes = []
         self.arrows = []
+        # Node -> arrows starting or ending at it.
+        self._adj = {}
         self.dragging_node = None
         self.drag_offset = QPointF(0, 0)
         self.selected_node = None
         self.selected_arrow = None
         self.arrow_source_node = None
+        # Uniform grid for hit-testing: cell -> nodes overlapping it.
+        self._grid = {}
+        self._grid_cells = {}
+        # Insertion order, so that the topmost node wins a hit-test.
+        self._node_order = {}
+        self._next_order = 0
+        # Arrow endpoints as (N, 2) arrays for batched hit-testing with numpy,
+        # rebuilt lazily whenever arrows or node geometry change.
+        self._arrow_starts = None
+        self._arrow_ends = None
+        self._arrow_arrays_dirty = True
+        # While dragging, everything except the dragged node and its arrows
+        # is rendered once into this pixmap and blitted on each repaint.
+        self._static_pixmap = None
+        # Drag repaints are collected here and flushed at most once per
+        # display frame (~60 Hz) instead of on every mouse move.
+        self._pending_rect = QRectF()
+        self._pending_update = False
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(16)
+        self._update_timer.timeout.connect(self._do_update)
+        # Number of concept and linking-word nodes, used for default names.
+        self._concept_count = 0
+        self._text_count = 0
         self.setMinimumSize(2000, 2000)
         self.node_font = QFont()
         self.node_font.setPointSize(12)
-        self.setAutoFillBackground(True)
-        p = self.palette()
-        p.setColor(self.backgroundRole(), CANVAS_BG)
-        self.setPalette(p)
+        self.node_metrics = QFontMetrics(self.node_font)
+        # paintEvent fills every exposed pixel itself, so Qt need not erase first.
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, True)
+        # Canvas -> widget transform and its inverse; see set_zoom().
         self._zoom = 1.0
+        self._view = QTransform()
+        self._view_inv = QTransform()
 
         self.editor = QLineEdit(self)
         self.editor.hide()
@@ -176,17 +274,168 @@ class CanvasWidget(QWidget):
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.scale(self._zoom, self._zoom)
-        painter.fillRect(self.rect(), CANVAS_BG)
-        for arrow in self.arrows:
-            start, end = arrow.points()
-            self.draw_arrow(painter, start, end, arrow.selected)
-        for node in self.nodes:
-            if isinstance(node, TextNode):
+        paint_rect = self.to_canvas_rect(QRectF(event.rect()))
+        if self._static_pixmap is not None:
+            painter.drawPixmap(0, 0, self._static_pixmap)
+            painter.setWorldTransform(self._view)
+            node = self.dragging_node
+            self.render_to_painter(painter, paint_rect, nodes=[node], arrows=self.arrows_of(node))
+            return
+        painter.fillRect(event.rect(), CANVAS_BG)
+        painter.setWorldTransform(self._view)
+        self.render_to_painter(painter, paint_rect)
+
+    def render_static_pixmap(self):
+        """Render everything but the dragged node and its arrows to a pixmap."""
+        node = self.dragging_node
+        moving = set(self.arrows_of(node))
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap((QSizeF(self.size()) * dpr).toSize())
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(CANVAS_BG)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setWorldTransform(self._view)
+        self.render_to_painter(painter, nodes=[n for n in self.nodes if n is not node],
+                               arrows=[a for a in self.arrows if a not in moving])
+        painter.end()
+        return pixmap
+
+    def render_to_painter(self, painter, paint_rect=None, nodes=None, arrows=None):
+        """Draw the diagram in canvas coordinates, without a background.
+
+        When paint_rect is given, only items overlapping it are drawn.
+        nodes and arrows default to the whole diagram.
+        """
+        if arrows is None:
+            arrows = self.arrows
+        if nodes is None:
+            nodes = self.nodes
+        if paint_rect is not None:
+            arrows = [a for a in arrows if a.bounding_rect().intersects(paint_rect)]
+            nodes = [n for n in nodes if self.node_paint_rect(n).intersects(paint_rect)]
+        self.draw_arrows(painter, [a for a in arrows if not a.selected])
+        self.draw_arrows(painter, [a for a in arrows if a.selected], selected=True)
+        for node in nodes:
+            if node.is_text:
                 node.draw(painter, selected=node.selected)
             else:
                 self.draw_node(painter, node)
 
+    def diagram_bounds(self):
+        return self.dirty_rect(self.nodes, self.arrows)
+
+    def to_canvas(self, pos):
+        return self._view_inv.map(pos)
+
+    def to_canvas_rect(self, rect):
+        return self._view_inv.mapRect(rect)
+
+    def node_paint_rect(self, node):
+        return node.rect().adjusted(-PAINT_MARGIN, -PAINT_MARGIN, PAINT_MARGIN, PAINT_MARGIN)
+
+    def dirty_rect(self, nodes=(), arrows=()):
+        """Return the canvas area covered by the given nodes and arrows."""
+        rect = QRectF()
+        for node in nodes:
+            rect = rect.united(self.node_paint_rect(node))
+        for arrow in arrows:
+            rect = rect.united(arrow.bounding_rect())
+        return rect
+
+    def selection_rect(self):
+        nodes = [self.selected_node] if self.selected_node else []
+        arrows = [self.selected_arrow] if self.selected_arrow else []
+        return self.dirty_rect(nodes, arrows)
+
+    def update_canvas_rect(self, rect):
+        """Schedule a repaint of a rect given in canvas coordinates."""
+        if rect.isEmpty():
+            return
+        self.update(self._view.mapRect(rect).toAlignedRect().adjusted(-1, -1, 1, 1))
+
+    def grid_cells(self, rect):
+        x0, x1 = int(rect.left() // GRID_CELL), int(rect.right() // GRID_CELL)
+        y0, y1 = int(rect.top() // GRID_CELL), int(rect.bottom() // GRID_CELL)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def index_node(self, node):
+        """Register node in the hit-testing grid under its current rect."""
+        cells = self.grid_cells(node.rect())
+        if self._grid_cells.get(node) == cells:
+            return
+        self.unindex_node(node)
+        for cell in cells:
+            self._grid.setdefault(cell, []).append(node)
+        self._grid_cells[node] = cells
+        if node not in self._node_order:
+            self._node_order[node] = self._next_order
+            self._next_order += 1
+
+    def unindex_node(self, node):
+        for cell in self._grid_cells.pop(node, ()):
+            bucket = self._grid[cell]
+            bucket.remove(node)
+            if not bucket:
+                del self._grid[cell]
+
+    def clear_index(self):
+        self._grid.clear()
+        self._grid_cells.clear()
+        self._node_order.clear()
+        self._next_order = 0
+
+    def node_at(self, pos):
+        """Return the topmost node containing pos, or None."""
+        cell = (int(pos.x() // GRID_CELL), int(pos.y() // GRID_CELL))
+        hits = [n for n in self._grid.get(cell, ()) if n.contains(pos)]
+        if not hits:
+            return None
+        return max(hits, key=self._node_order.__getitem__)
+
+    def rebuild_arrow_arrays(self):
+        points = [arrow.points() for arrow in self.arrows]
+        self._arrow_starts = np.array([(s.x(), s.y()) for s, _ in points], dtype=np.float32).reshape(-1, 2)
+        self._arrow_ends = np.array([(e.x(), e.y()) for _, e in points], dtype=np.float32).reshape(-1, 2)
+        self._arrow_arrays_dirty = False
+
+    def arrow_at(self, pos, tolerance=8):
+        """Return the topmost arrow within tolerance of pos, or None."""
+        if np is None:
+            for arrow in reversed(self.arrows):
+                if arrow.contains(pos, tolerance):
+                    return arrow
+            return None
+        if not self.arrows:
+            return None
+        if self._arrow_arrays_dirty:
+            self.rebuild_arrow_arrays()
+        p = np.array([pos.x(), pos.y()], dtype=np.float32)
+        starts, ends = self._arrow_starts, self._arrow_ends
+        d = ends - starts
+        t = np.clip(((p - starts) * d).sum(1) / ((d * d).sum(1) + 1e-9), 0, 1)
+        proj = starts + t[:, None] * d
+        dist2 = ((proj - p) ** 2).sum(1)
+        hits = np.flatnonzero(dist2 < tolerance * tolerance)
+        return self.arrows[hits[-1]] if hits.size else None
+
+    def arrows_of(self, node):
+        """Return the arrows touching node. The list must not be modified."""
+        return self._adj.get(node, [])
+
+    def link_arrow(self, arrow):
+        self.arrows.append(arrow)
+        self._adj.setdefault(arrow.start_node, []).append(arrow)
+        if arrow.end_node is not arrow.start_node:
+            self._adj.setdefault(arrow.end_node, []).append(arrow)
+        self._arrow_arrays_dirty = True
+
+    def unlink_arrow(self, arrow):
+        self.arrows.remove(arrow)
+        for node in {arrow.start_node, arrow.end_node}:
+            self._adj[node].remove(arrow)
+        self._arrow_arrays_dirty = True
+
     def draw_node(self, painter, node):
         if node.selected:
             pen = QPen(QColor(0, 120, 215), 3)
@@ -201,93 +450,125 @@ class CanvasWidget(QWidget):
         painter.setFont(node.font)
         painter.drawText(node.rect(), Qt.AlignmentFlag.AlignCenter, node.text)
 
-    def draw_arrow(self, painter, start, end, selected=False):
-        pen = QPen(QColor(0, 120, 215), 3) if selected else QPen(Qt.GlobalColor.black, 2)
-        painter.setPen(pen)
-        painter.drawLine(start, end)
-        self.draw_arrowhead(painter, start, end, selected)
-
-    def draw_arrowhead(self, painter, start, end, selected=False):
-        arrow_size = 15
-        angle = math.atan2(end.y() - start.y(), end.x() - start.x())
-        p1 = end
-        p2 = QPointF(
-            end.x() - arrow_size * math.cos(angle - math.pi / 6),
-            end.y() - arrow_size * math.sin(angle - math.pi / 6)
-        )
-        p3 = QPointF(
-            end.x() - arrow_size * math.cos(angle + math.pi / 6),
-            end.y() - arrow_size * math.sin(angle + math.pi / 6)
-        )
-        painter.setBrush(QBrush(QColor(0, 120, 215)) if selected else QBrush(Qt.GlobalColor.black))
-        painter.drawPolygon([p1, p2, p3])
+    def draw_arrows(self, painter, arrows, selected=False):
+        """Draw arrows that share a selection state with one pen and brush."""
+        if not arrows:
+            return
+        color = QColor(0, 120, 215) if selected else QColor(Qt.GlobalColor.black)
+        painter.setPen(QPen(color, 3 if selected else 2))
+        painter.setBrush(QBrush(color))
+        lines = []
+        heads = QPainterPath()
+        # Arrowheads all wind the same way, so overlapping ones stay filled.
+        heads.setFillRule(Qt.FillRule.WindingFill)
+        for arrow in arrows:
+            start, end = arrow.points()
+            lines.append(QLineF(start, end))
+            heads.addPolygon(self.arrowhead(start, end))
+            heads.closeSubpath()
+        painter.drawLines(lines)
+        painter.drawPath(heads)
+
+    def arrowhead(self, start, end):
+        # Rotate the reversed shaft direction by +/-30 degrees with a fixed
+        # matrix instead of going through atan2/cos/sin for every arrow.
+        ex, ey = end.x(), end.y()
+        dx, dy = ex - start.x(), ey - start.y()
+        length = math.hypot(dx, dy)
+        if length == 0:
+            ux, uy = 1.0, 0.0
+        else:
+            ux, uy = dx / length, dy / length
+        c = ARROW_SIZE * ARROWHEAD_COS
+        s = ARROW_SIZE * ARROWHEAD_SIN
+        p2 = QPointF(ex - ux * c - uy * s, ey - uy * c + ux * s)
+        p3 = QPointF(ex - ux * c + uy * s, ey - uy * c - ux * s)
+        return QPolygonF([end, p2, p3])
 
     def mousePressEvent(self, event):
-        pos = event.position() / self._zoom
+        pos = self.to_canvas(event.position())
         if event.button() == Qt.MouseButton.LeftButton:
-            for arrow in reversed(self.arrows):
-                if arrow.contains(pos):
-                    self.select_arrow(arrow)
-                    self.hide_editor()
-                    return
-            for node in reversed(self.nodes):
-                if node.contains(pos):
-                    self.select_node(node)
-                    self.dragging_node = node
-                    self.drag_offset = pos - QPointF(node.x, node.y)
-                    self.hide_editor()
-                    self.update()
-                    return
+            arrow = self.arrow_at(pos)
+            if arrow:
+                self.select_arrow(arrow)
+                self.hide_editor()
+                return
+            node = self.node_at(pos)
+            if node:
+                self.select_node(node)
+                self.dragging_node = node
+                self.drag_offset = pos - QPointF(node.x, node.y)
+                self.hide_editor()
+                return
             self.select_node(None)
             self.select_arrow(None)
             self.dragging_node = None
             self.hide_editor()
-            self.update()
         elif event.button() == Qt.MouseButton.RightButton:
-            for node in reversed(self.nodes):
-                if node.contains(pos):
-                    if self.arrow_source_node and self.arrow_source_node != node:
-                        self.arrows.append(Arrow(self.arrow_source_node, node))
-                        self.arrow_source_node = None
-                        self.setCursor(Qt.CursorShape.ArrowCursor)
-                        self.hide_editor()
-                        self.update()
-                    else:
-                        self.arrow_source_node = node
-                        self.setCursor(Qt.CursorShape.CrossCursor)
-                    return
+            node = self.node_at(pos)
+            if node:
+                if self.arrow_source_node and self.arrow_source_node != node:
+                    arrow = Arrow(self.arrow_source_node, node)
+                    self.link_arrow(arrow)
+                    self.arrow_source_node = None
+                    self.setCursor(Qt.CursorShape.ArrowCursor)
+                    self.hide_editor()
+                    self.update_canvas_rect(arrow.bounding_rect())
+                else:
+                    self.arrow_source_node = node
+                    self.setCursor(Qt.CursorShape.CrossCursor)
+                return
             if self.arrow_source_node:
                 self.arrow_source_node = None
                 self.setCursor(Qt.CursorShape.ArrowCursor)
 
     def mouseMoveEvent(self, event):
         if self.dragging_node:
-            pos = event.position() / self._zoom - self.drag_offset
-            self.dragging_node.x = pos.x()
-            self.dragging_node.y = pos.y()
+            node = self.dragging_node
+            if self._static_pixmap is None:
+                self._static_pixmap = self.render_static_pixmap()
+            arrows = self.arrows_of(node)
+            dirty = self.dirty_rect([node], arrows)
+            pos = self.to_canvas(event.position()) - self.drag_offset
+            node.set_pos(pos.x(), pos.y())
+            self.index_node(node)
+            self._arrow_arrays_dirty = True
             self.hide_editor()
-            self.update()
+            self._pending_rect = self._pending_rect.united(dirty.united(self.dirty_rect([node], arrows)))
+            if not self._pending_update:
+                self._pending_update = True
+                self._update_timer.start()
+
+    def _do_update(self):
+        self._pending_update = False
+        self.update_canvas_rect(self._pending_rect)
+        self._pending_rect = QRectF()
 
     def mouseReleaseEvent(self, event):
+        if self._static_pixmap is not None:
+            # Repaint the dropped node normally so it regains its stacking order.
+            node = self.dragging_node
+            self._static_pixmap = None
+            self.update_canvas_rect(self.dirty_rect([node], self.arrows_of(node)))
         self.dragging_node = None
 
+    def resizeEvent(self, event):
+        self._static_pixmap = None
+        super().resizeEvent(event)
+
     def mouseDoubleClickEvent(self, event):
-        pos = event.position() / self._zoom
-        for node in reversed(self.nodes):
-            if node.contains(pos):
-                self.editing_node = node
-                self.show_editor(node)
-                return
+        pos = self.to_canvas(event.position())
+        node = self.node_at(pos)
+        if node:
+            self.editing_node = node
+            self.show_editor(node)
+            return
         self.add_node(x=20, y=20)
 
     def show_editor(self, node):
-        rect = node.rect()
+        rect = self._view.mapRect(node.rect())
         self.editor.setFont(node.font)
-        x = int(rect.x() * self._zoom)
-        y = int(rect.y() * self._zoom)
-        w = int(rect.width() * self._zoom)
-        h = int(rect.height() * self._zoom)
-        self.editor.setGeometry(x, y, w, h)
+        self.editor.setGeometry(int(rect.x()), int(rect.y()), int(rect.width()), int(rect.height()))
         self.editor.setText(node.text)
         self.editor.show()
         self.editor.setFocus()
@@ -295,34 +576,44 @@ class CanvasWidget(QWidget):
 
     def finish_editing(self):
         if self.editing_node:
-            text = self.editor.text()
-            self.editing_node.set_text(text)
+            node = self.editing_node
+            arrows = self.arrows_of(node)
+            dirty = self.dirty_rect([node], arrows)
+            node.set_text(self.editor.text())
+            self.index_node(node)
+            self._arrow_arrays_dirty = True
             self.editing_node = None
             self.editor.hide()
-            self.update()
+            self.update_canvas_rect(dirty.united(self.dirty_rect([node], arrows)))
 
     def hide_editor(self):
         self.editor.hide()
         self.editing_node = None
 
-    def zoom_in(self):
-        self._zoom *= 1.15
+    def set_zoom(self, zoom):
+        self._zoom = zoom
+        self._view = QTransform.fromScale(zoom, zoom)
+        self._view_inv, _ = self._view.inverted()
+        self._static_pixmap = None
         self.hide_editor()
         self.update()
 
+    def zoom_in(self):
+        self.set_zoom(self._zoom * 1.15)
+
     def zoom_out(self):
-        self._zoom /= 1.15
-        self.hide_editor()
-        self.update()
+        self.set_zoom(self._zoom / 1.15)
 
     def select_node(self, node):
+        dirty = self.selection_rect()
         for n in self.nodes:
             n.selected = (n is node)
         self.selected_node = node
         self.select_arrow(None)
-        self.update()
+        self.update_canvas_rect(dirty.united(self.selection_rect()))
 
     def select_arrow(self, arrow):
+        dirty = self.selection_rect()
         for a in self.arrows:
             a.selected = (a is arrow)
         self.selected_arrow = arrow
@@ -330,64 +621,99 @@ class CanvasWidget(QWidget):
             for n in self.nodes:
                 n.selected = False
             self.selected_node = None
-        self.update()
+        self.update_canvas_rect(dirty.united(self.selection_rect()))
 
     def add_node(self, x=20, y=20, text=None):
         if text is None:
-            text = f"Node {len([n for n in self.nodes if not isinstance(n, TextNode)])+1}"
-        node = Node(x, y, text=text, font=self.node_font)
+            text = f"Node {self._concept_count + 1}"
+        node = Node(x, y, text=text, font=self.node_font, metrics=self.node_metrics)
         self.nodes.append(node)
-        self.update()
+        self._concept_count += 1
+        self.index_node(node)
+        self.update_canvas_rect(self.node_paint_rect(node))
 
     def add_text_node(self, x=20, y=20, text=None):
         if text is None:
-            text = f"Text {len([n for n in self.nodes if isinstance(n, TextNode)])+1}"
-        node = TextNode(x, y, text=text, font=self.node_font)
+            text = f"Text {self._text_count + 1}"
+        node = TextNode(x, y, text=text, font=self.node_font, metrics=self.node_metrics)
         self.nodes.append(node)
-        self.update()
+        self._text_count += 1
+        self.index_node(node)
+        self.update_canvas_rect(self.node_paint_rect(node))
 
     def delete_selected_node(self):
         if self.selected_node:
-            self.arrows = [
-                arrow for arrow in self.arrows
-                if arrow.start_node != self.selected_node and arrow.end_node != self.selected_node
-            ]
+            node = self.selected_node
+            doomed = self._adj.pop(node, [])
+            dirty = self.dirty_rect([node], doomed)
+            for arrow in doomed:
+                other = arrow.end_node if arrow.start_node is node else arrow.start_node
+                if other is not node:
+                    self._adj[other].remove(arrow)
+            if doomed:
+                gone = set(doomed)
+                self.arrows = [arrow for arrow in self.arrows if arrow not in gone]
             self.nodes.remove(self.selected_node)
+            self.unindex_node(self.selected_node)
+            del self._node_order[self.selected_node]
+            if self.selected_node.is_text:
+                self._text_count -= 1
+            else:
+                self._concept_count -= 1
+            self._arrow_arrays_dirty = True
             self.selected_node = None
-            self.update()
+            self.update_canvas_rect(dirty)
 
     def delete_selected_arrow(self):
         if self.selected_arrow:
-            self.arrows.remove(self.selected_arrow)
+            dirty = self.selected_arrow.bounding_rect()
+            self.unlink_arrow(self.selected_arrow)
             self.selected_arrow = None
-            self.update()
+            self.update_canvas_rect(dirty)
 
     def save_diagram(self, filename):
-        node_indices = {node: idx for idx, node in enumerate(self.nodes)}
-        data = {
-            "nodes": [node.to_dict() for node in self.nodes],
-            "arrows": [arrow.to_dict(node_indices) for arrow in self.arrows]
-        }
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        node_dicts = []
+        for idx, node in enumerate(self.nodes):
+            node._save_idx = idx
+            node_dicts.append(node.to_dict())
+        try:
+            data = {
+                "nodes": node_dicts,
+                "arrows": [arrow.to_dict() for arrow in self.arrows]
+            }
+        finally:
+            for node in self.nodes:
+                del node._save_idx
+        if orjson:
+            raw = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        else:
+            raw = json.dumps(data, indent=2).encode("utf-8")
+        with open(filename, "wb") as f:
+            f.write(raw)
 
     def load_diagram(self, filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(filename, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
         self.nodes.clear()
         self.arrows.clear()
+        self._adj.clear()
+        self.clear_index()
         for nd in data["nodes"]:
             if nd["type"] == "node":
-                node = Node.from_dict(nd, font=self.node_font)
+                node = Node.from_dict(nd, font=self.node_font, metrics=self.node_metrics)
             elif nd["type"] == "textnode":
-                node = TextNode.from_dict(nd, font=self.node_font)
+                node = TextNode.from_dict(nd, font=self.node_font, metrics=self.node_metrics)
             else:
                 continue
             self.nodes.append(node)
+            self.index_node(node)
+        self._text_count = sum(1 for n in self.nodes if n.is_text)
+        self._concept_count = len(self.nodes) - self._text_count
         for ad in data["arrows"]:
             start = self.nodes[ad["start"]]
             end = self.nodes[ad["end"]]
-            self.arrows.append(Arrow(start, end))
+            self.link_arrow(Arrow(start, end))
         self.selected_node = None
         self.selected_arrow = None
         self.arrow_source_node = None
@@ -397,31 +723,38 @@ class CanvasWidget(QWidget):
         outgoing = {}
         for arrow in self.arrows:
             outgoing.setdefault(arrow.start_node, []).append(arrow.end_node)
+        text_nodes = {n for n in self.nodes if n.is_text}
+        concepts = [n for n in self.nodes if n not in text_nodes]
+        lines = [
+            f"{node.text}, {mid.text}, {end.text}\n"
+            for node in concepts
+            for mid in outgoing.get(node, ())
+            if mid in text_nodes
+            for end in outgoing.get(mid, ())
+            if end not in text_nodes
+        ]
+        # One write of the whole buffer rather than one call per line.
         with open(filename, "w", encoding="utf-8") as f:
-            for node in self.nodes:
-                if isinstance(node, Node) and not isinstance(node, TextNode):
-                    for mid in outgoing.get(node, []):
-                        if isinstance(mid, TextNode):
-                            for end in outgoing.get(mid, []):
-                                if isinstance(end, Node) and not isinstance(end, TextNode):
-                                    f.write(f"{node.text}, {mid.text}, {end.text}\n")
+            f.write("".join(lines))
 
     def export_svg(self, filename):
-        from PyQt6.QtCore import QSize
+        # Crop to the diagram itself rather than the whole canvas.
+        bounds = self.diagram_bounds()
+        if bounds.isEmpty():
+            bounds = QRectF(self.rect())
+        bounds = QRectF(bounds.toAlignedRect())
         generator = QSvgGenerator()
         generator.setFileName(filename)
-        width = int(self.width() * self._zoom)
-        height = int(self.height() * self._zoom)
-        generator.setSize(QSize(width, height))
-        generator.setViewBox(QRectF(0, 0, width, height))
+        generator.setResolution(72)
+        generator.setSize(bounds.size().toSize())
+        generator.setViewBox(QRectF(0, 0, bounds.width(), bounds.height()))
         generator.setTitle("Diagram SVG Export")
         generator.setDescription("Exported diagram as SVG")
         painter = QPainter()
         painter.begin(generator)
-        old_zoom = self._zoom
-        self._zoom = 1.0
-        self.render(painter)
-        self._zoom = old_zoom
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(-bounds.topLeft())
+        self.render_to_painter(painter)
         painter.end()
 
 class MainWindow(QMainWindow):